@@ -7,13 +7,17 @@ shared between different applications to avoid code duplication.
 import logging
 import re
 import time
-import numpy as np
+from collections import OrderedDict
 from tts_service import TTS, DEFAULT_VOICE
-from utils.tts_utils import clean_text_for_tts
+from utils.tts_utils import audio_segment_to_int16, clean_text_for_tts
 import threading
 
 logger = logging.getLogger(__name__)
 
+# Short, frequently repeated phrases ("Okay.", "I understand.") are served from memory
+TTS_CACHE_SIZE = 1024
+TTS_CACHE_MAX_CHARS = 80
+
 class TTSBaseApp:
     def __init__(self, voice: str = DEFAULT_VOICE):
         default_voice = voice
@@ -33,6 +37,11 @@ class TTSBaseApp:
         self.sentences = []
         self.current_sample_rate = None
         self.lock = threading.Lock()
+        self._voices = None
+        self._tts_cache = OrderedDict()
+        self._tts_cache_lock = threading.Lock()
+        # The model keeps per-call KV caches and per-voice context; serialize every call into it
+        self._tts_lock = threading.Lock()
         
     def split_text_into_sentences(self, text):
         """Split text into sentences and return list of processed sentences."""
@@ -63,8 +72,11 @@ class TTSBaseApp:
         print(f"Attempting to change voice to: {new_voice_name}")
         with self.lock:
             try:
-                self.tts.load_voice(new_voice_name)
+                with self._tts_lock:
+                    self.tts.load_voice(new_voice_name)
                 self.current_voice = new_voice_name
+                with self._tts_cache_lock:
+                    self._tts_cache.clear()
                 self.current_status = f"Voice changed to {new_voice_name}. Ready."
                 print(f"Successfully changed voice to {new_voice_name}.")
             except Exception as e:
@@ -73,6 +85,41 @@ class TTSBaseApp:
                 print(self.current_status)
             return self.current_status
     
+    def _synthesize_segment(self, sentence, temperature=0.8, topk=40, speed_factor=1.0):
+        """Generate the (speed adjusted) AudioSegment for a sentence, using the LRU cache for short phrases."""
+        cacheable = len(sentence) <= TTS_CACHE_MAX_CHARS
+        key = (self.current_voice, sentence, temperature, topk, speed_factor)
+        if cacheable:
+            with self._tts_cache_lock:
+                audio_segment = self._tts_cache.get(key)
+                if audio_segment is not None:
+                    self._tts_cache.move_to_end(key)
+                    logger.info(f"TTS cache hit for: {sentence[:50]}")
+                    return audio_segment
+
+        # torch releases the GIL inside its kernels, so other threads keep running meanwhile
+        with self._tts_lock:
+            audio_segment = self.tts.generate_audio_segment(
+                sentence,
+                temperature=temperature,
+                topk=topk,
+                fade_duration=50,
+                start_silence_duration=150,
+                end_silence_duration=150,
+            )
+
+        # Apply speed adjustment if needed
+        if speed_factor != 1.0:
+            audio_segment = audio_segment.speedup(playback_speed=speed_factor)
+
+        if cacheable:
+            with self._tts_cache_lock:
+                self._tts_cache[key] = audio_segment
+                self._tts_cache.move_to_end(key)
+                if len(self._tts_cache) > TTS_CACHE_SIZE:
+                    self._tts_cache.popitem(last=False)
+        return audio_segment
+
     def generate_audio_for_sentence_index(self, sentence_index, temperature=0.8, topk=40, speed_factor=1.0):
         """Generate audio for a specific sentence index and return audio data for streaming"""
         audio_data = None  # Default to None
@@ -94,19 +141,10 @@ class TTSBaseApp:
             start_time = time.time()
             
             # Generate audio for this sentence
-            audio_segment = self.tts.generate_audio_segment(
-                sentence,
-                temperature=temperature,
-                topk=topk,
-                fade_duration=50,
-                start_silence_duration=150,
-                end_silence_duration=150,
+            audio_segment = self._synthesize_segment(
+                sentence, temperature=temperature, topk=topk, speed_factor=speed_factor
             )
             
-            # Apply speed adjustment if needed
-            if speed_factor != 1.0:
-                audio_segment = audio_segment.speedup(playback_speed=speed_factor)
-            
             with self.lock:
                 # Set sample rate if not already set
                 if self.current_sample_rate is None:
@@ -115,18 +153,8 @@ class TTSBaseApp:
                 # Each child class will have its own way of storing audio_segments
                 self._store_audio_segment(audio_segment, sentence_index)
             
-            # Convert pydub AudioSegment to numpy array for Gradio
-            raw_samples = audio_segment.get_array_of_samples()
-            audio_np_raw = np.array(raw_samples)
-            
-            # Normalize to float32 between -1.0 and 1.0 as expected by Gradio
-            if audio_np_raw.dtype == np.int16:
-                audio_np = audio_np_raw.astype(np.float32) / 32768.0
-            elif audio_np_raw.dtype != np.float32:
-                max_val = np.iinfo(audio_np_raw.dtype).max
-                audio_np = audio_np_raw.astype(np.float32) / max_val
-            else:
-                audio_np = audio_np_raw
+            # Convert pydub AudioSegment to int16 PCM for Gradio
+            audio_np = audio_segment_to_int16(audio_segment)
             
             # Create audio data tuple (sample_rate, audio_array) for Gradio
             audio_data = (audio_segment.frame_rate, audio_np)
@@ -138,7 +166,11 @@ class TTSBaseApp:
                          f"({duration:.1f}s audio / {process_time:.1f}s proc)"
             
             with self.lock:
-                is_last = sentence_index == len(self.sentences) - 1
+                # While a producer is still streaming, catching up with it isn't the end
+                is_last = (
+                    sentence_index == len(self.sentences) - 1
+                    and not self._awaiting_sentences()
+                )
                 if not is_last:
                     next_status += ". Generating next..."
                 else:
@@ -160,11 +192,21 @@ class TTSBaseApp:
         This is meant to be overridden by child classes with specific storage methods.
         """
         pass
+
+    def _awaiting_sentences(self):
+        """
+        Whether more sentences may still be appended to self.sentences.
+        Subclasses that stream sentences in from a producer return True until it finishes.
+        """
+        return False
         
     def list_available_voices(self):
-        """Return the list of available TTS voices."""
+        """Return the list of available TTS voices (cached after the first successful call)."""
+        if self._voices is not None:
+            return self._voices
         try:
-            return self.tts.list_voices()
+            self._voices = self.tts.list_voices()
+            return self._voices
         except Exception as e:
             logger.error(f"Error listing voices: {e}")
             return ["Error loading voices"] 
\ No newline at end of file
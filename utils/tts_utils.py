@@ -44,6 +44,46 @@ def clean_text_for_tts(text):
 
     return text.strip()
 
+def combine_audio_segments(segments):
+    """
+    Concatenate AudioSegments in a single pass.
+    Chained `combined += seg` copies the whole accumulated audio on every append,
+    which is quadratic in story length; joining the raw frames once is linear.
+    Returns None if there are no segments.
+    """
+    if not segments:
+        return None
+
+    first = segments[0]
+    if any(
+        seg.frame_rate != first.frame_rate
+        or seg.sample_width != first.sample_width
+        or seg.channels != first.channels
+        for seg in segments[1:]
+    ):
+        # Mixed formats need pydub to convert, fall back to pairwise appends
+        combined = first
+        for seg in segments[1:]:
+            combined += seg
+        return combined
+
+    return first._spawn(b"".join(seg.raw_data for seg in segments))
+
+def audio_segment_to_int16(audio_segment):
+    """
+    Convert a pydub AudioSegment to an int16 PCM numpy array for Gradio streaming.
+    16-bit audio (what the model produces) is wrapped without copying; other sample
+    widths are rescaled into an int16 buffer. int16 is half the payload of float32.
+    """
+    if audio_segment.sample_width == 2:
+        return np.frombuffer(audio_segment.raw_data, dtype=np.int16)
+
+    samples = np.array(audio_segment.get_array_of_samples())
+    max_val = np.iinfo(samples.dtype).max
+    pcm = np.empty(samples.shape, dtype=np.int16)
+    np.multiply(samples, 32767 / max_val, out=pcm, casting="unsafe")
+    return pcm
+
 def generate_tts_audio(text: str, tts_instance: TTS, temperature=0.7, top_k=None):
     """
     Generates TTS audio from text using the provided TTS instance,
@@ -1,7 +1,8 @@
 import abc
 import logging
 import os
-import time
+import threading
+from collections import OrderedDict
 
 from ask_llm.core import AskLLM
 from ask_llm.utils.config import global_config as llm_config
@@ -10,11 +11,19 @@ from .tts_base import TTSBaseApp
 
 logger = logging.getLogger(__name__)
 
+# Loaded models can hold GPU memory next to the TTS model, so only the current and previous stay cached
+LLM_CACHE_SIZE = 2
+
 
 class WebAppBase(TTSBaseApp, abc.ABC):
     def __init__(self, voice: str, model: str):
         self.temp_audio_files = []
         self.audio_segments = []
+        self._new_sentence = threading.Event()  # Set by producers after appending to self.sentences
+        # Guards self.llm, _llm_cache, the current model alias and llm_config edits.
+        # Queries hold it for their whole run, so swaps never happen mid-response.
+        # Reentrant because a streaming producer holds it around get_answer, which takes it too.
+        self._llm_lock = threading.RLock()
 
         self.model_manager = ModelManager(llm_config)
 
@@ -31,6 +40,7 @@ class WebAppBase(TTSBaseApp, abc.ABC):
             print(f"Resolved initial model alias: {self.current_resolved_alias}")
             try:
                 self.llm = AskLLM(resolved_model_alias=self.current_resolved_alias, config=llm_config)
+                self._llm_cache = OrderedDict({self.current_resolved_alias: self.llm})
             except Exception as e:
                 print(
                     f"[Fatal Error] Failed to initialize AskLLM with {self.current_resolved_alias}: {e}"
@@ -56,6 +66,10 @@ class WebAppBase(TTSBaseApp, abc.ABC):
     def _store_audio_segment(self, audio_segment, sentence_index):
         self.audio_segments.append(audio_segment)
 
+    def _stream_error(self):
+        # Subclasses return the producer's error message if the current stream failed
+        return None
+
     def interrupt_and_reset(self):
         logger.info("Interrupting any ongoing TTS generation.")
         with self.lock:
@@ -77,18 +91,35 @@ class WebAppBase(TTSBaseApp, abc.ABC):
             f"Starting sentence generator loop from index {start_index} to {end_index} with speed {speed_factor}"
         )
         current_index = start_index
+        # A new query or interrupt swaps in a new list; this loop only serves the one it started on
+        sentences = self.sentences
 
         while True:
-            with self.lock:
-                total_sentences = len(self.sentences)
-                is_within_bounds = (
-                    current_index < total_sentences and current_index < end_index
-                )
+            if self.sentences is not sentences:
+                logger.info("Sentence list replaced by a newer response, stopping loop.")
+                self.update_status("Processing stopped.")
+                yield False, None  # Yield active=False, audio=None
+                return
+
+            total_sentences = len(sentences)  # Append-only list, len() needs no lock
+            is_within_bounds = current_index < total_sentences and (
+                end_index is None or current_index < end_index
+            )
+
+            if active and not is_within_bounds and self._awaiting_sentences():
+                # Producer still streaming, sleep until it signals the next sentence
+                self._new_sentence.wait(timeout=1.0)
+                self._new_sentence.clear()
+                continue
 
             if not active or not is_within_bounds:
                 final_status = "Processing stopped."
                 if active and not is_within_bounds:
-                    final_status = "All sentences processed. Audio playback complete."
+                    # Keep a failed stream's error visible instead of reporting success
+                    final_status = (
+                        self._stream_error()
+                        or "All sentences processed. Audio playback complete."
+                    )
 
                 logger.info(f"Generator loop finished. Status: {final_status}")
                 self.update_status(final_status)
@@ -100,6 +131,9 @@ class WebAppBase(TTSBaseApp, abc.ABC):
             )
             next_index = current_index + 1
 
+            if self.sentences is not sentences:
+                continue  # Interrupted during synthesis, drop the stale audio
+
             if "Error" in status and audio_tuple is None:
                 logger.error(
                     f"Error processing sentence {current_index + 1}. Will stop."
@@ -112,7 +146,6 @@ class WebAppBase(TTSBaseApp, abc.ABC):
             self.stream_audio_response(audio_tuple)
             yield active, audio_tuple  # Keep active, yield audio
             current_index = next_index
-            time.sleep(0.05)
 
     def clear_session(self):
         logger.info("Clearing base session state...")
@@ -140,7 +173,9 @@ class WebAppBase(TTSBaseApp, abc.ABC):
     def change_model(self, new_model_requested):
         print(f"Attempting to change model to: {new_model_requested}")
         status_update = ""
-        with self.lock:
+        # Only the LLM lock is held, so audio streaming (which needs self.lock) keeps going
+        # while a model loads; queries and prompt rebuilds wait for the swap instead
+        with self._llm_lock:
             resolved_new_alias = self.model_manager.resolve_model_alias(
                 new_model_requested
             )
@@ -149,13 +184,26 @@ class WebAppBase(TTSBaseApp, abc.ABC):
                 print(error_msg)
                 status_update = error_msg
             else:
-                print(
-                    f"Resolved '{new_model_requested}' to '{resolved_new_alias}'. Initializing..."
-                )
                 try:
-                    new_llm = AskLLM(
-                        resolved_model_alias=resolved_new_alias, config=llm_config
-                    )
+                    new_llm = self._llm_cache.get(resolved_new_alias)
+                    if new_llm is not None:
+                        # Reuse the already loaded model, starting from a fresh history
+                        print(f"Reusing cached model '{resolved_new_alias}'.")
+                        if hasattr(new_llm, "history_manager"):
+                            new_llm.history_manager.clear_history()
+                    else:
+                        # Make room first so an evicted model is released before the new one loads
+                        while len(self._llm_cache) >= LLM_CACHE_SIZE:
+                            evicted_alias, _ = self._llm_cache.popitem(last=False)
+                            print(f"Evicted cached model '{evicted_alias}'.")
+                        print(
+                            f"Resolved '{new_model_requested}' to '{resolved_new_alias}'. Initializing..."
+                        )
+                        new_llm = AskLLM(
+                            resolved_model_alias=resolved_new_alias, config=llm_config
+                        )
+                    self._llm_cache[resolved_new_alias] = new_llm
+                    self._llm_cache.move_to_end(resolved_new_alias)
                     self.llm = new_llm
                     self.current_resolved_alias = resolved_new_alias
                     self.current_model = resolved_new_alias
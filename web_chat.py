@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import logging
+import queue
+import re
 import sys
+import threading
 
 import gradio as gr
 
 from ask_llm.core import AskLLM
 from ask_llm.utils.config import global_config as llm_config
 from utils.tts_base import DEFAULT_VOICE
+from utils.tts_utils import clean_text_for_tts
 from utils.web_base import WebAppBase
 
 logging.basicConfig(
@@ -15,6 +19,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_LOOP_DONE = object()  # Sentinel put on the audio queue when the sentence loop finishes
+SENTENCE_BIN_WORDS = 20  # Short adjacent sentences are packed into one TTS call up to this size
+FIRST_CHUNK_SECONDS = 0.5  # The first sentence is streamed in slices so playback starts sooner
+
 
 bubbles_theme = gr.Theme(
     primary_hue="blue",
@@ -34,6 +43,11 @@ class ChatApp(WebAppBase):
         llm_config.SYSTEM_MESSAGE = "You are a personal companion. Your purpose is to please the user in any way he desires. Do not question the user's desires. Your response will be spoken via a text-to-speech system, so you should only include words to be spoken in your response. The first sentence of every response should be more than six words. Do not use any emojis or annotations. Do not use parentheticals or action lines. Remember to only respond with words to be spoken. Write out and normalize text, rather than using abbreviations, numbers, and so on. For example, $2.35 should be two dollars and thirty-five cents, MPH should be miles per hour, and so on. Mathematical formulae should be written out as a human would speak it. Use only standard English alphabet characters [A-Z] along with basic punctuation. Your response should not use quotes to indicate dialogue. Sentences should be complete and stand alone. You should respond in the second person, as if you are speaking directly to the reader."
 
         self.ui_messages = []
+        self._response_id = 0
+        self._streaming = False
+        self._response_error = None  # Error message if the current response's stream failed
+        self._sent_status = None
+        self._streaming_message = None  # (assistant message dict, token list) of the live response
 
     def update_status(self, message: str):
         self.current_status = message
@@ -60,125 +74,291 @@ class ChatApp(WebAppBase):
 
         return tuple(updates)
 
-    def get_answer(self, query: str) -> str:
-        return self.llm.query(query, plaintext_output=True, stream=False)
+    def _chatbot_update(self):
+        with self.lock:
+            # Tokens are only joined into the message when it is actually sent. The producer
+            # writes the final text and clears _streaming_message under the same lock, so a
+            # partial join can never land after it.
+            if self._streaming_message:
+                message, response_parts = self._streaming_message
+                message["content"] = "".join(response_parts)
+        return self.ui_messages
+
+    def _status_update(self):
+        if self.current_status == self._sent_status:
+            return gr.update()
+        self._sent_status = self.current_status
+        return self.current_status
+
+    def get_answer(self, query: str, temperature=None):
+        # The lock is held until the stream is exhausted: the backend may read llm_config
+        # lazily, and prompt or model swaps must not land mid-response
+        with self._llm_lock:
+            if temperature is not None:
+                llm_config.TEMPERATURE = temperature
+            response = self.llm.query(query, plaintext_output=True, stream=True)
+            if isinstance(response, str):
+                yield response
+                return
+            yield from response
+
+    def split_text_into_sentences(self, text):
+        cleaned_text = clean_text_for_tts(text)
+        return [s.strip() for s in _SENT_SPLIT.split(cleaned_text) if s.strip()]
+
+    def _awaiting_sentences(self):
+        return self._streaming
+
+    def _stream_error(self):
+        return self._response_error
+
+    def _append_sentences(self, text, sentences, pending, flush=False):
+        """Greedily pack sentences into bins of ~SENTENCE_BIN_WORDS words and queue full bins.
+
+        The first bin of a response is always a single sentence to keep time-to-first-audio low.
+        Sentences that don't fill a bin yet are kept in `pending` until more arrive or `flush`.
+        """
+        first_bin = not sentences
+
+        # Whitespace-only deltas and flushes skip the cleanup regexes entirely
+        new_sentences = self.split_text_into_sentences(text) if text and not text.isspace() else []
+
+        bins = []
+        for sentence in new_sentences:
+            pending_words = sum(len(s.split()) for s in pending)
+            if pending and pending_words + len(sentence.split()) > SENTENCE_BIN_WORDS:
+                bins.append(" ".join(pending))
+                pending.clear()
+                pending_words = 0
+            pending.append(sentence)
+            pending_words += len(sentence.split())
+            if first_bin or pending_words >= SENTENCE_BIN_WORDS:
+                bins.append(" ".join(pending))
+                pending.clear()
+                first_bin = False
+
+        if flush and pending:
+            bins.append(" ".join(pending))
+            pending.clear()
+
+        if not bins:
+            return
+        # Append-only and single producer, so no lock: list.extend is atomic under the GIL.
+        # An interrupt swaps in a new self.sentences, so a stale producer appends to an orphan.
+        sentences.extend(bins)
+        self._new_sentence.set()
+
+    def _stream_response(
+        self, query, temperature, assistant_message, response_parts, sentences, response_id
+    ):
+        """Consume the LLM token stream, handing off complete sentences as they arrive."""
+        # Tokens are collected in lists; repeated str += would copy the whole text per token
+        buffer_parts = []
+        pending = []
+        answer = None
+        # Held for the whole stream: AskLLM has a single history, so an interrupted producer
+        # must finish (at its next token) before the next query may start
+        self._llm_lock.acquire()
+        try:
+            if response_id != self._response_id:
+                logger.info("Response interrupted before its query started, skipping.")
+                return
+            answer = self.get_answer(query, temperature)
+            for token in answer:
+                if response_id != self._response_id:
+                    logger.info("Response interrupted, stopping LLM stream.")
+                    return
+                response_parts.append(token)
+                buffer_parts.append(token)
+                if not any(ch.isspace() for ch in token):
+                    continue  # A sentence boundary needs whitespace after the punctuation
+                parts = _SENT_SPLIT.split("".join(buffer_parts))
+                buffer_parts = [parts.pop()]  # Keep only the trailing partial sentence
+                parts = [p for p in parts if p.strip()]
+                if parts:
+                    self._append_sentences(" ".join(parts), sentences, pending)
+
+            self._append_sentences("".join(buffer_parts), sentences, pending, flush=True)
+            logger.info(f"LLM stream finished ({len(response_parts)} chunks)")
+        except Exception as e:
+            error_msg = f"Error during query: {e}"
+            logger.exception(error_msg)
+            response_parts[:] = [f"Error: {str(e)}"]
+            if response_id == self._response_id:
+                self._response_error = error_msg
+            self.update_status(error_msg)
+        finally:
+            if answer is not None:
+                answer.close()  # Exit get_answer's lock scope now, not at garbage collection
+            self._llm_lock.release()
+            with self.lock:
+                assistant_message["content"] = "".join(response_parts)
+                if self._streaming_message and self._streaming_message[0] is assistant_message:
+                    self._streaming_message = None  # Final text written, stop re-joining
+                is_current = response_id == self._response_id
+                if is_current:
+                    self._streaming = False
+            if is_current:
+                self._new_sentence.set()  # Wake the loop so it sees the stream has ended
+
+    def interrupt_and_reset(self):
+        with self.lock:
+            self._response_id += 1
+            self._streaming = False
+        self._new_sentence.set()
+        return super().interrupt_and_reset()
 
     def process_query(self, query, temperature=0.7):
         processed_query = query.strip()
         if not processed_query:
-            return self.ui_messages, self.current_status, 0, 0, False, None
+            yield self.ui_messages, self.current_status, 0, 0, False, None
+            return
 
+        sentences = []
         with self.lock:
-            self.sentences = []
+            self.sentences = sentences
             self.audio_segments = []
+            self._response_id += 1
+            response_id = self._response_id
+            self._streaming = True
+            self._response_error = None
 
         user_message = {"role": "user", "content": processed_query}
         self.ui_messages.append(user_message)
-
+        assistant_message = {"role": "assistant", "content": ""}
+        self.ui_messages.append(assistant_message)
+        response_parts = []
+        self._streaming_message = (assistant_message, response_parts)
+
+        threading.Thread(
+            target=self._stream_response,
+            args=(
+                processed_query,
+                temperature,
+                assistant_message,
+                response_parts,
+                sentences,
+                response_id,
+            ),
+            daemon=True,
+        ).start()
+
+        # The sentence loop picks up sentences as the stream produces them, so no end index
         yield (
             self.ui_messages,
-            self.update_status(f"Processing query with {self.current_model}..."),
-            0,
+            self.update_status(f"Streaming response from {self.current_model}..."),
             0,
-            False,
+            None,
+            True,
             None,
         )
 
-        try:
-            llm_config.TEMPERATURE = temperature
-            response = self.get_answer(
-                processed_query
-            )  # Use abstract method implementation
-            assistant_message = {"role": "assistant", "content": response}
-            self.ui_messages.append(assistant_message)
-
-            yield (
-                self.ui_messages,
-                self.update_status("Processing response for TTS..."),
-                0,
-                0,
-                False,
-                None,
-            )
-
-            new_sentences = self.split_text_into_sentences(response)
-            logger.info(f"Split response into {len(new_sentences)} sentences")
-
-            if not new_sentences:
-                yield (
-                    self.ui_messages,
-                    self.update_status("No valid sentences found in response."),
-                    0,
-                    0,
-                    False,
-                    None,
-                )
-                return
-
-            start_idx = 0
-            end_idx = len(new_sentences)
-            with self.lock:
-                self.sentences = new_sentences
-
-            yield (
-                self.ui_messages,
-                self.update_status(
-                    f"Starting audio generation for {end_idx} sentences..."
-                ),
-                start_idx,
-                end_idx,
-                True,
-                None,
-            )
-
-        except Exception as e:
-            error_msg = f"Error during query: {e}"
-            logger.exception(error_msg)
-            if not self.ui_messages or self.ui_messages[-1]["role"] != "assistant":
-                self.ui_messages.append(
-                    {"role": "assistant", "content": f"Error: {str(e)}"}
-                )
-
-            yield self.ui_messages, self.update_status(error_msg), 0, 0, False, None
-
     def gradio_sentence_generator_wrapper(
         self, start_index, end_index, active, temperature=0.7, speed_factor=1.2
     ):
         if not active:
             yield (
+                self.ui_messages,
                 self.current_status,
                 start_index,
                 False,
                 None,
-            )  # status, next_idx, active, audio
+            )  # chatbot, status, next_idx, active, audio
             return
 
-        generator = self.sentence_generator_loop(
-            start_index, end_index, active, temperature, speed_factor
-        )
+        # Synthesize on a worker so sentence N+1 is generated while N streams to the browser
+        audio_queue = queue.Queue(maxsize=1)
+        stop = threading.Event()
+        threading.Thread(
+            target=self._run_sentence_loop,
+            args=(audio_queue, stop, start_index, end_index, active, temperature, speed_factor),
+            daemon=True,
+        ).start()
 
+        self._sent_status = None
         next_idx = start_index
         try:
             while True:
-                active, audio_tuple = next(generator)
+                item = audio_queue.get()
+                if item is _LOOP_DONE:
+                    yield (
+                        self._chatbot_update(),
+                        self._status_update(),
+                        next_idx,
+                        False,
+                        None,
+                    )
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                active, audio_tuple = item
                 next_idx += 1  # Base loop doesn't yield index, infer it
-                yield self.current_status, next_idx, active, audio_tuple
-        except StopIteration:
-            yield self.current_status, next_idx, False, None
+                if next_idx == 1 and audio_tuple is not None:
+                    # First sentence of the response: the player is idle, so feed it small slices
+                    sr, wav = audio_tuple
+                    step = int(sr * FIRST_CHUNK_SECONDS)
+                    for i in range(0, len(wav), step):
+                        yield (
+                            self._chatbot_update(),
+                            self._status_update(),
+                            next_idx,
+                            active,
+                            (sr, wav[i : i + step]),
+                        )
+                    continue
+                yield (
+                    self._chatbot_update(),
+                    self._status_update(),
+                    next_idx,
+                    active,
+                    audio_tuple,
+                )
         except Exception as e:
             logger.error(f"Error in sentence generator wrapper: {e}")
             yield (
+                self.ui_messages,
                 self.update_status(f"Error during audio generation: {e}"),
                 next_idx,
                 False,
                 None,
             )
+        finally:
+            stop.set()  # Release the worker if Gradio closed the generator early
+
+    @staticmethod
+    def _put_until_stopped(audio_queue, item, stop):
+        while not stop.is_set():
+            try:
+                audio_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_sentence_loop(self, audio_queue, stop, *loop_args):
+        try:
+            for item in self.sentence_generator_loop(*loop_args):
+                if not self._put_until_stopped(audio_queue, item, stop):
+                    return
+            result = _LOOP_DONE
+        except Exception as e:
+            result = e
+        self._put_until_stopped(audio_queue, result, stop)
 
     def clear_session(self):
         print("Clearing ChatApp session...")
-        if hasattr(self, "llm") and hasattr(self.llm, "history_manager"):
-            self.llm.history_manager.clear_history()
-            print("LLM history cleared.")
+        # Stop any in-flight producer, as interrupt_and_reset does
+        with self.lock:
+            self._response_id += 1
+            self._streaming = False
+            self._streaming_message = None
+        self._new_sentence.set()
+
+        # Waits for a stopped producer to release the LLM before wiping its history
+        with self._llm_lock:
+            if hasattr(self, "llm") and hasattr(self.llm, "history_manager"):
+                self.llm.history_manager.clear_history()
+                print("LLM history cleared.")
 
         self.ui_messages = []
 
@@ -191,22 +371,33 @@ class ChatApp(WebAppBase):
         )  # Get UI component updates from clear_ui
         return chatbot_val, self.update_status(status_update), audio_val, 0, False
 
+    def _build_llm(self, resolved_alias):
+        return AskLLM(resolved_model_alias=resolved_alias, config=llm_config)
+
     def update_system_prompt(self, new_system_prompt):
         print(f"Updating system prompt to: {new_system_prompt[:100]}...")
+
+        yield self.update_status("Reloading model with new system prompt...")
+
         status_update = ""
         try:
-            with self.lock:
+            # AskLLM may capture the system message when it is constructed, so always
+            # rebuild. Only the shared LLM lock is held, so TTS keeps running; this waits
+            # for an in-flight query to finish, and change_model can't interleave.
+            with self._llm_lock:
                 llm_config.SYSTEM_MESSAGE = new_system_prompt.strip()
-                self.llm = AskLLM(
-                    resolved_model_alias=self.current_resolved_alias, config=llm_config
-                )
+                new_llm = self._build_llm(self.current_resolved_alias)
+                self.llm = new_llm
+                # Other cached models were built with the old prompt
+                self._llm_cache.clear()
+                self._llm_cache[self.current_resolved_alias] = new_llm
                 status_update = f"System prompt updated. Model: {self.current_model}"
         except Exception as e:
             error_msg = f"Error updating system prompt: {e}"
             logger.exception(error_msg)
             status_update = error_msg
 
-        return self.update_status(status_update)
+        yield self.update_status(status_update)
 
 
 # --- Main Gradio UI setup ---
@@ -328,20 +519,27 @@ def main():
             audio_output,
         ]
         loop_outputs = [
+            chatbot,
             status_output,
             sentence_index,
             processing_active,
             audio_output,
         ]  # Matches wrapper yield
 
-        query_input.submit(
+        submit_loop = query_input.submit(
             fn=chat_app.interrupt_and_reset,  # STEP 1: Interrupt & update status
             outputs=[status_output],  # Only status is directly updated here
+            concurrency_limit=1,
+            concurrency_id="process_query",
         ).then(
             fn=chat_app.process_query,  # STEP 2: Process query (yields multiple updates)
             inputs=[query_input, temperature_slider],
             outputs=process_outputs,
             show_progress="hidden",
+            # One ChatApp is shared by every browser session, so everything that resets or
+            # starts a response (interrupt, query, clear) runs one at a time in this group
+            concurrency_limit=1,
+            concurrency_id="process_query",
         ).then(
             fn=lambda: gr.update(value=""),  # STEP 3: Clear input box
             outputs=[query_input],
@@ -356,13 +554,22 @@ def main():
             ],
             outputs=loop_outputs,
             show_progress="hidden",
+            concurrency_limit=1,  # One sentence loop drives the shared TTS model
+            concurrency_id="sentence_loop",
         )
 
-        submit_btn.click(fn=chat_app.interrupt_and_reset, outputs=[status_output]).then(
+        click_loop = submit_btn.click(
+            fn=chat_app.interrupt_and_reset,
+            outputs=[status_output],
+            concurrency_limit=1,
+            concurrency_id="process_query",
+        ).then(
             fn=chat_app.process_query,
             inputs=[query_input, temperature_slider],
             outputs=process_outputs,
             show_progress="hidden",
+            concurrency_limit=1,
+            concurrency_id="process_query",
         ).then(fn=lambda: gr.update(value=""), outputs=[query_input]).then(
             fn=chat_app.gradio_sentence_generator_wrapper,
             inputs=[
@@ -374,8 +581,15 @@ def main():
             ],
             outputs=loop_outputs,
             show_progress="hidden",
+            concurrency_limit=1,
+            concurrency_id="sentence_loop",
         )
 
+        # A new message cancels the running sentence loop so the new one isn't queued behind it.
+        # Registered as separate listeners because cancels can only reference existing events.
+        query_input.submit(fn=None, cancels=[submit_loop, click_loop])
+        submit_btn.click(fn=None, cancels=[submit_loop, click_loop])
+
         clear_btn.click(
             fn=chat_app.clear_session,  # Returns tuple for UI updates
             inputs=[],
@@ -386,27 +600,32 @@ def main():
                 sentence_index,
                 processing_active,
             ],
+            concurrency_limit=1,
+            concurrency_id="process_query",
         )
 
         model_selector.change(
             fn=chat_app.change_model,  # Returns status update
             inputs=[model_selector],
             outputs=[status_output],
+            concurrency_limit=4,
         )
 
         voice_selector.change(
             fn=chat_app.change_voice,  # Returns status update
             inputs=[voice_selector],
             outputs=[status_output],
+            concurrency_limit=4,
         )
 
         update_prompt_btn.click(
             fn=chat_app.update_system_prompt,  # Returns status update
             inputs=[system_prompt_editor],
             outputs=[status_output],
+            concurrency_limit=4,
         )
 
-    demo.queue(max_size=20).launch(server_name="0.0.0.0", share=False)
+    demo.queue(default_concurrency_limit=4, max_size=20).launch(server_name="0.0.0.0", share=False)
 
 
 if __name__ == "__main__":
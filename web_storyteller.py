@@ -7,9 +7,9 @@ import tempfile
 import time
 
 import gradio as gr
-import numpy as np
 
 from ask_llm.utils.config import global_config as llm_config
+from utils.tts_utils import audio_segment_to_int16, combine_audio_segments
 from utils.web_base import WebAppBase
 
 logger = logging.getLogger(__name__)
@@ -53,7 +53,8 @@ class StorytellerApp(WebAppBase):
         yield history, self.current_status, 0, 0, False, None, self.generated_prompt_wav_paths
 
         try:
-            response = self.llm.query(query, plaintext_output=True)
+            with self._llm_lock:
+                response = self.llm.query(query, plaintext_output=True)
             history[-1] = (query, response)
         except Exception as e:
             print(f"LLM Query failed: {e}")
@@ -106,16 +107,9 @@ class StorytellerApp(WebAppBase):
                         # Use all segments except the last empty one we just added
                         all_segments = [seg for prompt_list in self.prompt_audio_segments[:-1] for seg in prompt_list]
                         if all_segments:
-                            combined_seg = all_segments[0]
-                            for seg in all_segments[1:]:
-                                combined_seg += seg
+                            combined_seg = combine_audio_segments(all_segments)
                             
-                            initial_np = np.array(combined_seg.get_array_of_samples())
-                            if initial_np.dtype == np.int16:
-                                initial_np = initial_np.astype(np.float32) / 32768.0
-                            elif initial_np.dtype != np.float32:
-                                max_val = np.iinfo(initial_np.dtype).max
-                                initial_np = initial_np.astype(np.float32) / max_val
+                            initial_np = audio_segment_to_int16(combined_seg)
                                 
                             initial_audio_to_send = (self.current_sample_rate, initial_np)
                             print(f"Sending initial combined audio for continuation ({len(all_segments)} segments, {combined_seg.duration_seconds:.2f}s)")
@@ -174,16 +168,9 @@ class StorytellerApp(WebAppBase):
                     # Use all segments except the last empty one we just added
                     all_segments = [seg for prompt_list in self.prompt_audio_segments[:-1] for seg in prompt_list]
                     if all_segments:
-                        combined_seg = all_segments[0]
-                        for seg in all_segments[1:]:
-                            combined_seg += seg
+                        combined_seg = combine_audio_segments(all_segments)
                         
-                        initial_np = np.array(combined_seg.get_array_of_samples())
-                        if initial_np.dtype == np.int16:
-                            initial_np = initial_np.astype(np.float32) / 32768.0
-                        elif initial_np.dtype != np.float32:
-                            max_val = np.iinfo(initial_np.dtype).max
-                            initial_np = initial_np.astype(np.float32) / max_val
+                        initial_np = audio_segment_to_int16(combined_seg)
                             
                         initial_audio_to_send = (self.current_sample_rate, initial_np)
                         print(f"Sending initial combined audio for pasted text ({len(all_segments)} segments)")
@@ -242,9 +229,7 @@ class StorytellerApp(WebAppBase):
 
         print(f"Combining {len(segments_to_save)} segments for prompt {prompt_index+1}...")
         try:
-            combined_audio = segments_to_save[0]
-            for seg in segments_to_save[1:]:
-                combined_audio += seg
+            combined_audio = combine_audio_segments(segments_to_save)
         except Exception as e:
             error_msg = f"Error combining audio segments for prompt {prompt_index+1}: {e}"
             print(error_msg)
@@ -307,9 +292,7 @@ class StorytellerApp(WebAppBase):
 
         print(f"Combining {len(all_segments)} audio segments for full story...")
         try:
-            combined_audio = all_segments[0]
-            for seg in all_segments[1:]:
-                combined_audio += seg
+            combined_audio = combine_audio_segments(all_segments)
         except Exception as e:
             error_msg = f"Error combining audio segments for full story: {e}"
             print(error_msg)